@@ -1,14 +1,36 @@
 import os
+from functools import lru_cache
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 
-_conf_path = "./config/.env" if os.getenv("DEV_STATUS") is True else "./config/.dev.env"
+_is_dev_status = os.getenv("DEV_STATUS", "").lower() in ("true", "1", "t")
+_conf_path = "./config/.env" if _is_dev_status else "./config/.dev.env"
 
-load_dotenv(_conf_path)
+
+@lru_cache(maxsize=2)
+def _parse_env_file(path: str, mtime: float) -> dict[str, str]:
+    """Function parse .env file once per (path, mtime) pair.
+
+    mtime is part of the cache key, so uvicorn dev reloads re-parse the file
+    only when it actually changed
+    """
+    return {k: v for k, v in dotenv_values(path).items() if v is not None}
+
+
+def _env_file_mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+# Файл .env парсится один раз при импорте. Реальные переменные окружения
+# имеют приоритет (docker-compose передает их через env_file)
+_env: dict[str, str] = {
+    **_parse_env_file(_conf_path, _env_file_mtime(_conf_path)),
+    **os.environ,
+}
 
 
 def _get_env(key: str) -> str:
-    if not (value := os.getenv(key)):
+    if not (value := _env.get(key)):
         msg = f"Environment variable {key} not found"
         #TODO: add logger
         raise AttributeError(msg)
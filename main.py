@@ -1,15 +1,28 @@
+import asyncio
+import hashlib
+import json
+import time
 from pathlib import Path
 
 import uvicorn
 from fastapi import Depends, FastAPI, Form, Request, Response
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
 from config import env
 from youtube.google_api_auth import create_credentials_storage, create_flow
 from youtube.youtube import generate_rss_feed
 
-app = FastAPI(title="Youtube RSS")
+try:
+    # uvloop поставляется вместе с uvicorn[standard], но на случай его
+    # отсутствия остаемся на стандартном event loop
+    import uvloop
+
+    uvloop.install()
+except ModuleNotFoundError:
+    pass
+
+app = FastAPI(title="Youtube RSS", default_response_class=ORJSONResponse)
 
 templates = Jinja2Templates(directory="youtube/templates")
 
@@ -21,10 +34,47 @@ flow = create_flow(
 credentials_storage = create_credentials_storage(Path("tmp/credentials.json"))
 
 
+# Лента меняется только при появлении новых видео, поэтому готовые байты
+# кэшируются в памяти процесса
+_RSS_CACHE_TTL = 60.0
+_rss_cache = {"body": b"", "etag": "", "ts": 0.0}
+# Лок схлопывает конкурентные промахи кэша в одну перегенерацию: иначе
+# каждый запрос тратит квоту api и гонится в записи одних и тех же видео
+_rss_cache_lock = asyncio.Lock()
+
+
+def _rss_cache_is_fresh() -> bool:
+    return bool(
+        _rss_cache["body"] and time.monotonic() - _rss_cache["ts"] < _RSS_CACHE_TTL,
+    )
+
+
+def _rss_response(request: Request) -> Response:
+    if request.headers.get("if-none-match") == _rss_cache["etag"]:
+        return Response(status_code=304)
+    return Response(
+        content=_rss_cache["body"],
+        media_type="application/xml",
+        headers={"ETag": _rss_cache["etag"]},
+    )
+
+
 @app.get("/rss")
-async def rss() -> Response:
-    body = await generate_rss_feed()
-    return Response(content=body, media_type="application/xml")
+async def rss(request: Request) -> Response:
+    if _rss_cache_is_fresh():
+        return _rss_response(request)
+
+    async with _rss_cache_lock:
+        # Пока ждали лок, ленту мог перегенерировать другой запрос
+        if _rss_cache_is_fresh():
+            return _rss_response(request)
+
+        body = await generate_rss_feed()
+        _rss_cache["body"] = body
+        # BLAKE2 быстрее SHA1 на коротком теле ленты
+        _rss_cache["etag"] = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _rss_cache["ts"] = time.monotonic()
+    return _rss_response(request)
 
 
 @app.get("/")
@@ -34,11 +84,12 @@ async def index_page(request: Request) -> HTMLResponse:
 
 
 @app.post("/login")
-def enter_auth_code(auth_code: str = Form(...)):
-    flow.fetch_token(code=auth_code)
+async def enter_auth_code(auth_code: str = Form(...)):
+    # Блокирующий обмен кода на токен уводим с событийного цикла
+    _ = await asyncio.to_thread(flow.fetch_token, code=auth_code)
     credentials = flow.credentials
-    credentials_storage.save(credentials)
-    return credentials.to_json()
+    await credentials_storage.save(credentials)
+    return json.loads(credentials.to_json())
     # return "OK"
 
 
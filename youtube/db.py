@@ -1,15 +1,52 @@
-from collections import deque
+import asyncio
+import logging
 from collections.abc import Iterable
-
-from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
-from pydantic import ValidationError
-from pymongo import UpdateOne
-
-from youtube.schemas import SearchResultVideo, Subscription, VideoItem
+from itertools import batched
+
+from motor.motor_asyncio import (
+    AsyncIOMotorCollection,
+    AsyncIOMotorCursor,
+    AsyncIOMotorDatabase,
+)
+from pydantic import TypeAdapter, ValidationError
+from pymongo import ReturnDocument, UpdateOne
+
+from youtube.schemas import (
+    FeedVideoItem,
+    SearchResultVideo,
+    Subscription,
+    VideoItem,
+)
 from youtube.utils.logger import conf_logger
 
 logger = conf_logger(__name__, "D")
 
+# Адаптеры собираются один раз при импорте, чтобы валидировать список
+# документов одним вызовом, а не по одному документу
+_subscriptions_adapter = TypeAdapter(list[Subscription])
+_feed_videos_adapter = TypeAdapter(list[FeedVideoItem])
+
+# Проекция под FeedVideoItem: шаблонам лент не нужен полный документ видео
+_feed_video_projection = {
+    "_id": 0,
+    "id": 1,
+    "snippet.publishedAt": 1,
+    "snippet.title": 1,
+    "snippet.description": 1,
+    "snippet.channelTitle": 1,
+    "contentDetails.duration": 1,
+    "player.embedHtml": 1,
+}
+
+
+async def _drain_cursor(cursor: AsyncIOMotorCursor, batch_size: int = 1000) -> list:
+    """Function drain motor cursor in large batches.
+
+    One thread-pool dispatch per batch instead of one per document
+    """
+    _ = cursor.batch_size(batch_size)
+    return await cursor.to_list(length=None)
+
 
 async def get_subscriptions_from_db(
     collection: AsyncIOMotorCollection,
@@ -17,10 +54,10 @@ async def get_subscriptions_from_db(
     """Function retrieve set of Subscriptions from db"""
     logger.debug("Getting subscriptions from db collection: %s", collection)
 
-    cursor = collection.find({}, {"_id": 0})
+    subs = await _drain_cursor(collection.find({}, {"_id": 0}))
 
     try:
-        return {Subscription.model_validate(sub) async for sub in cursor}
+        return set(await asyncio.to_thread(_subscriptions_adapter.validate_python, subs))
     except ValidationError:
         logger.exception("Failed to validate subscriptions loaded from db")
         raise
@@ -32,9 +69,19 @@ async def save_items_to_db(
 ) -> None:
     """Function to save items to db collection"""
     logger.debug("Saving %s items to db collection: %s", len(items), collection.name)
-    if items:
-        dump_items = (item.model_dump() for item in items)
-        _ = await collection.insert_many(dump_items)
+    if not items:
+        return
+
+    dump_items = [item.model_dump() for item in items]
+    semaphore = asyncio.Semaphore(8)
+
+    async def insert_batch(batch: tuple[dict, ...]) -> None:
+        async with semaphore:
+            _ = await collection.insert_many(batch, ordered=False)
+
+    _ = await asyncio.gather(
+        *(insert_batch(batch) for batch in batched(dump_items, 64)),
+    )
 
 
 async def read_last_video_id_from_db(
@@ -42,15 +89,14 @@ async def read_last_video_id_from_db(
     channel_id: str,
 ) -> str | None:
     """Function return last video id from db. If video not in db return None"""
-    last_video = (
-        vid_collection.find({"snippet.channelId": channel_id}, {"_id": 0})
-        .sort("snippet.publishTime", -1)
-        .limit(1)
+    last_video = await vid_collection.find_one(
+        {"snippet.channelId": channel_id},
+        {"_id": 0},
+        sort=[("snippet.publishTime", -1)],
     )
-    result = await last_video.to_list(1)
-    if result:
+    if last_video:
         try:
-            return SearchResultVideo.model_validate(result[0]).id.videoId
+            return SearchResultVideo.model_validate(last_video).id.videoId
         except ValidationError:
             logger.exception(
                 "Failed to validate last video for channel %s loaded from db",
@@ -66,68 +112,72 @@ async def read_channel_all_video_ids_from_db(
     channel_id: str,
 ) -> set[str]:
     """Function return set of all video ids from db for given channel."""
-    videos = vid_collection.find(
+    cursor = vid_collection.find(
         {"snippet.channelId": channel_id},
         {"_id": 0, "id": 1},
         # TODO: replace 1, 0 for True False
     )
-    return {vid["id"] async for vid in videos}
+    videos = await _drain_cursor(cursor)
+    return {vid["id"] for vid in videos}
 
 
 async def read_videos_info_from_db_by_id_list(
     vid_collection: AsyncIOMotorCollection,
     video_ids: Iterable[str],
-) -> list[VideoItem]:
-    """Function return list of VideoItem from db by ids list"""
-    logger.debug("Read videos from db by ids list: %s", video_ids)
-    res = vid_collection.find({"id": {"$in": tuple(video_ids)}}, {"_id": 0})
+) -> list[FeedVideoItem]:
+    """Function return list of FeedVideoItem from db by ids list.
+
+    Documents are projected down to the fields used by the feed templates
+    and returned in the order of the given ids
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Read videos from db by ids list: %s", video_ids)
+    unique_ids = tuple(dict.fromkeys(video_ids))
+    cursor = vid_collection.find({"id": {"$in": unique_ids}}, _feed_video_projection)
+    # Лента ограничена ~40 видео — одного батча хватает
+    videos = await _drain_cursor(cursor, batch_size=64)
     try:
-        return [VideoItem.model_validate(r) async for r in res]
+        validated = await asyncio.to_thread(
+            _feed_videos_adapter.validate_python,
+            videos,
+        )
     except ValidationError:
-        logger.exception("Failed to validate videos loaded from db %s", video_ids)
+        logger.exception("Failed to validate videos loaded from db %s", unique_ids)
         raise
+    by_id = {video.id: video for video in validated}
+    return [by_id[vid_id] for vid_id in unique_ids if vid_id in by_id]
 
 
 async def read_last_video_ids_for_channel_from_db(
     vid_collection: AsyncIOMotorCollection,
     channel_id: str,
     limit: int = 20,
-) -> tuple[str, ...]:
-    """Function read last videos ids for given channel"""
+) -> frozenset[str]:
+    """Function read last videos ids for given channel.
+
+    Ids are returned as a frozenset, ready for membership tests
+    """
     logger.debug("Reading last %s videos for channel %s from db", limit, channel_id)
     pipeline = [
-        {
-            "$project": {
-                "_id": 0,
-                "snippet.channelId": 1,
-                "id": 1,
-                "snippet.publishedAt": 1,
-            },
-        },
         {"$match": {"snippet.channelId": channel_id}},
         {"$sort": {"snippet.publishedAt": -1}},
         {"$limit": limit},
-        {"$group": {"_id": 0, "ids": {"$push": "$id"}}},
+        {"$project": {"_id": 0, "id": 1}},
     ]
 
     cursor = vid_collection.aggregate(pipeline)
-    result = await cursor.to_list(1)
+    result = await cursor.to_list(limit)
     if result:
-        last_video_ids = result[0]["ids"]
-
+        last_video_ids = frozenset(video["id"] for video in result)
+    else:
+        logger.debug("No videos for channel %s in db", channel_id)
+        last_video_ids = frozenset()
+    if logger.isEnabledFor(logging.DEBUG):
         logger.debug(
-            "Last video ids from db for channel  %s: %s",
+            "Returning last video ids for channel %s: %s",
             channel_id,
             last_video_ids,
         )
-    else:
-        logger.debug("No videos for channel %s in db", channel_id)
-        last_video_ids = ()
-    logger.debug(
-        "Returning last video ids for channel %s: %s",
-        channel_id,
-        last_video_ids,
-    )
     return last_video_ids
 
 
@@ -140,43 +190,41 @@ async def save_subscriptions_to_db(
     Else ignore document
     """
     logger.debug("Saving subscriptions in db")
-    request = [
-        UpdateOne(
-            filter={"snippet.resourceId.channelId": sub.snippet.resourceId.channelId},
-            update={"$setOnInsert": sub.model_dump()},
-            upsert=True,
-        )
-        for sub in subscriptions
-    ]
-    _ = await db.subscriptions.bulk_write(request)
+    subs = list(subscriptions)
+    dumped = zip(
+        (sub.snippet.resourceId.channelId for sub in subs),
+        _subscriptions_adapter.dump_python(subs),
+        strict=True,
+    )
+    for batch in batched(dumped, 100):
+        request = [
+            UpdateOne(
+                filter={"snippet.resourceId.channelId": channel_id},
+                update={"$setOnInsert": dump},
+                upsert=True,
+            )
+            for channel_id, dump in batch
+        ]
+        _ = await db.subscriptions.bulk_write(request, ordered=False)
 
 
-async def load_rss_deque_from_db(
+async def push_video_ids_to_rss_deque(
     db: AsyncIOMotorDatabase,
+    video_ids: Iterable[str],
     rss_len: int = 40,
-) -> deque[str]:
+) -> list[str]:
     """
-    Method to load deque from db. If deque not exist in db, it will return empty deque.
+    Function atomically append new video ids to rss deque in db and return
+    updated id list. Deque length is maintained server-side with $slice,
+    so client sends only the new ids instead of the whole deque
     """
     # TODO: add loading rss len from settings file
-    logger.debug("Loading rss deque from db")
-    cursor = await db.rss.find_one({"_id": "rss_field"})
-    rss_deque = deque(maxlen=rss_len)
-    if cursor:
-        video_ids = cursor["deque"]
-        rss_deque.extend(video_ids)
-        logger.debug("Loaded rss deque from db: %s from db", rss_deque)
-    else:
-        logger.debug("deque in db is not exist. Using empty deque")
-
-    return rss_deque
-
-
-async def save_rss_deque_to_db(db: AsyncIOMotorDatabase, rss_deque: deque) -> None:
-    """Function to save deque to db"""
-    logger.debug("Saving rss deque: %s to db", rss_deque)
-    _ = await db.rss.update_one(
+    logger.debug("Pushing new video ids to rss deque in db")
+    document = await db.rss.find_one_and_update(
         {"_id": "rss_field"},
-        {"$set": {"deque": tuple(rss_deque)}},
+        {"$push": {"deque": {"$each": list(video_ids), "$slice": -rss_len}}},
         upsert=True,
+        return_document=ReturnDocument.AFTER,
+        projection={"_id": 0, "deque": 1},
     )
+    return document["deque"]
@@ -0,0 +1,34 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from config import env
+from youtube.utils.logger import conf_logger
+
+logger = conf_logger(__name__, "D")
+
+_motor_client: AsyncIOMotorClient | None = None
+
+
+def get_motor_client() -> AsyncIOMotorClient:
+    """Function return shared motor client, creating it on first use.
+
+    One client (and connection pool) is shared by all requests instead of
+    creating a client per feed build
+    """
+    global _motor_client  # noqa: PLW0603
+    if _motor_client is None:
+        logger.debug("Creating shared motor client for %s:%s", env.DB_HOST, env.DB_PORT)
+        _motor_client = AsyncIOMotorClient(
+            host=env.DB_HOST,
+            port=env.DB_PORT,
+            username=env.MONGO_INITDB_ROOT_USERNAME,
+            password=env.MONGO_INITDB_ROOT_PASSWORD,
+            maxPoolSize=200,
+            minPoolSize=20,
+            waitQueueTimeoutMS=2000,
+        )
+    return _motor_client
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    """Function return application database from shared client"""
+    return get_motor_client().youtube
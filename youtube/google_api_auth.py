@@ -1,7 +1,11 @@
 import asyncio
+import atexit
 import json
+import threading
 from collections.abc import Iterable
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Final, Literal, Protocol, override
 
@@ -13,15 +17,59 @@ from google_auth_oauthlib.flow import Flow, InstalledAppFlow
 from googleapiclient import discovery
 from googleapiclient.discovery import Resource
 from motor.motor_asyncio import AsyncIOMotorCollection
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 from youtube.exeptions import SettingsError
 from youtube.utils.logger import conf_logger
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
 logger = conf_logger(__name__, "D")
 
 
+def _json_loads(data: bytes) -> dict:
+    """Function parse json bytes with orjson if it is available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(data: dict) -> bytes:
+    """Function serialize dict to json bytes with orjson if it is available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
 CLIENT_SECRET_PATH: Final = "config/client_secret.json"
 
+# Один долгоживущий пул для блокирующих вызовов google api вместо
+# общего пула asyncio.to_thread
+_blocking_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gauth")
+_ = atexit.register(_blocking_executor.shutdown)
+
+_auth_request: Request | None = None
+
+
+def _get_auth_request() -> Request:
+    """Function return shared transport Request with pooled session.
+
+    Request() создает новую requests.Session (TLS контекст, адаптеры) при
+    каждом вызове, поэтому переиспользуем один экземпляр. Все обращения
+    идут из выделенного пула _blocking_executor
+    """
+    global _auth_request  # noqa: PLW0603
+    if _auth_request is None:
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("https://", adapter)
+        _auth_request = Request(session=session)
+    return _auth_request
+
 ScopeAliases = Literal[
     "manage_account",
     "channel_members",
@@ -52,10 +100,9 @@ async def ainput(prompt: str) -> str:
 
 
 class CredentialsStorage(Protocol):
-    # TODO: сделать асинхронным
-    def save(self, credentials: Credentials | Credentials2) -> None: ...
+    async def save(self, credentials: Credentials | Credentials2) -> None: ...
 
-    def load(self) -> Credentials | None: ...
+    async def load(self) -> Credentials | None: ...
 
     @override
     def __repr__(self) -> str: ...
@@ -66,10 +113,13 @@ class FileCredentialsStorage:
     Class to save and load credentials from file
     """
 
-    # TODO: сделать асинхронным
-
     def __init__(self, storage_file: Path) -> None:
         self.storage_file = storage_file
+        self._cached: Credentials | None = None
+        self._cached_mtime: int = 0
+        # save() может выполняться из asyncio.to_thread, поэтому кэш
+        # защищен локом
+        self._cache_lock = threading.Lock()
         if not self.storage_file.parent.exists():
             logger.debug(
                 "There is no directory for storage file: %s. Creating.",
@@ -77,25 +127,65 @@ class FileCredentialsStorage:
             )
             self.storage_file.parent.mkdir(parents=True, exist_ok=True)
 
-    def save(self, credentials: Credentials | Credentials2) -> None:
+    async def save(self, credentials: Credentials | Credentials2) -> None:
         """Method to save credentials to file"""
         logger.debug("Saving credentials to file: %s", self.storage_file)
-        _ = self.storage_file.write_text(credentials.to_json())
-
-    def load(self) -> Credentials | None:
+        payload = {
+            "token": credentials.token,
+            "refresh_token": credentials.refresh_token,
+            # У Credentials2 (external account) атрибут называется token_url
+            "token_uri": getattr(
+                credentials,
+                "token_uri",
+                getattr(credentials, "token_url", None),
+            ),
+            "client_id": credentials.client_id,
+            "client_secret": credentials.client_secret,
+            "scopes": credentials.scopes,
+            "universe_domain": getattr(
+                credentials,
+                "universe_domain",
+                "googleapis.com",
+            ),
+            "account": getattr(credentials, "account", ""),
+            "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
+        }
+        _ = await asyncio.to_thread(self.storage_file.write_bytes, _json_dumps(payload))
+        if isinstance(credentials, Credentials):
+            with self._cache_lock:
+                self._cached = credentials
+                self._cached_mtime = self.storage_file.stat().st_mtime_ns
+
+    async def load(self) -> Credentials | None:
         """Method to load credentials from file"""
         logger.debug("Loading credentials from file: %s", self.storage_file)
         if self.storage_file.exists():
+            # один stat() вместо чтения файла + разбора json, пока файл
+            # не менялся
+            mtime = self.storage_file.stat().st_mtime_ns
+            with self._cache_lock:
+                if self._cached is not None and mtime == self._cached_mtime:
+                    logger.debug("Using cached credentials for %s", self.storage_file)
+                    return self._cached
             try:
-                credentials: dict[str, str] = json.loads(self.storage_file.read_text())
-
-                # обрезаем Z в timestamp, иначе при request.execute() возникает
-                # ошибка с naive date
-                expiration_date = datetime.fromisoformat(
-                    credentials["expiry"].rstrip("Z"),
+                credentials: dict[str, str] = _json_loads(
+                    await asyncio.to_thread(self.storage_file.read_bytes),
                 )
 
-                return Credentials(
+                # save() пишет null, когда у credentials нет expiry
+                raw_expiry = credentials.get("expiry")
+                if raw_expiry is None:
+                    expiration_date = None
+                else:
+                    expiration_date = datetime.fromisoformat(raw_expiry)
+                    if expiration_date.tzinfo is not None:
+                        # Файлы, записанные через to_json(), хранят expiry
+                        # с "Z", а google-auth сравнивает его с naive utcnow
+                        expiration_date = expiration_date.astimezone(
+                            timezone.utc,
+                        ).replace(tzinfo=None)
+
+                loaded = Credentials(
                     token=credentials["token"],
                     refresh_token=credentials["refresh_token"],
                     token_uri=credentials["token_uri"],
@@ -106,8 +196,12 @@ class FileCredentialsStorage:
                     account=credentials["account"],
                     expiry=expiration_date,
                 )
+                with self._cache_lock:
+                    self._cached = loaded
+                    self._cached_mtime = mtime
+                return loaded
 
-            except (json.JSONDecodeError, KeyError):
+            except (ValueError, KeyError):
                 logger.debug("Credential file: %s is corrupted", self.storage_file)
                 return None
         else:
@@ -125,10 +219,10 @@ class DBCredentialsStorage:
     def __init__(self, storage_access_point: AsyncIOMotorCollection) -> None:
         self._col = storage_access_point
 
-    def save(self, credentials: Credentials | Credentials2) -> None:
+    async def save(self, credentials: Credentials | Credentials2) -> None:
         raise NotImplementedError
 
-    def load(self) -> Credentials | None:
+    async def load(self) -> Credentials | None:
         raise NotImplementedError
 
     @override
@@ -195,9 +289,9 @@ def _is_credentials_fresh(credentials: Credentials) -> bool:
     """
     logger.debug("Credentils state: %s", credentials.token_state.name)
     if is_fresh := (credentials.token_state.name == "FRESH"):
-        logger.debug("Credentials are expired, is fresh: %s", is_fresh)
-    else:
         logger.debug("Credentials are not expired, is fresh: %s", is_fresh)
+    else:
+        logger.debug("Credentials are expired, is fresh: %s", is_fresh)
     return is_fresh
 
 
@@ -271,6 +365,30 @@ def create_auth_pipe(
             raise SettingsError(msg)
 
 
+_resource_cache: dict[str, Resource] = {}
+
+
+def _build_youtube_resource(credentials: Credentials) -> Resource:
+    """Function build youtube api resource, reusing it while token is unchanged.
+
+    discovery.build разбирает большой discovery-документ и собирает дерево
+    Resource, поэтому результат кэшируется по токену. static_discovery
+    использует json из пакета googleapiclient без похода в сеть
+    """
+    resource = _resource_cache.get(credentials.token)
+    if resource is None:
+        _resource_cache.clear()
+        resource = discovery.build(
+            "youtube",
+            "v3",
+            credentials=credentials,
+            static_discovery=True,
+            cache_discovery=False,
+        )
+        _resource_cache[credentials.token] = resource
+    return resource
+
+
 async def create_youtube_resource(
     storage_access_point: Path | AsyncIOMotorCollection,
 ) -> Resource | None:
@@ -284,21 +402,23 @@ async def create_youtube_resource(
     """
     logger.debug("Creating youtube api resource")
     credentials_storage = create_credentials_storage(storage_access_point)
-    credentials = credentials_storage.load()
-    if credentials and _is_credentials_fresh(credentials):
-        credentials = await _refresh_credentials(credentials)
-        credentials_storage.save(credentials)
+    credentials = await credentials_storage.load()
+    if credentials:
+        if not _is_credentials_fresh(credentials):
+            credentials = await _refresh_credentials(credentials)
+            await credentials_storage.save(credentials)
 
         logger.debug("Youtube api resource created")
-        return discovery.build("youtube", "v3", credentials=credentials)
+        return _build_youtube_resource(credentials)
 
     logger.debug("youtube api resource not created")
     return None
 
 
-def _load_client_secret_file(client_secret_file: str) -> Path:
+@lru_cache(maxsize=4)
+def _load_client_secret_config(client_secret_file: str) -> dict:
     """
-    Function to load google api client secret file
+    Function to load and parse google api client secret file once
     https://developers.google.com/api-client-library/dotnet/guide/aaa_client_secrets
     ./config/client_secret.json
     """
@@ -311,21 +431,26 @@ def _load_client_secret_file(client_secret_file: str) -> Path:
         msg = f"Client secret file not found at: {client_secret_file}. Visit: {url}"
         logger.error(msg)
         raise FileNotFoundError(msg)
-    return client_secret
+    return _json_loads(client_secret.read_bytes())
 
 
 async def _refresh_credentials(credentials: Credentials) -> Credentials:
     """Function to refresh youtube api token"""
     logger.debug("refreshing credentials")
+    loop = asyncio.get_running_loop()
     try:
-        await asyncio.to_thread(credentials.refresh, Request())
+        _ = await loop.run_in_executor(
+            _blocking_executor,
+            credentials.refresh,
+            _get_auth_request(),
+        )
     except RefreshError:
         logger.exception("Failed to refresh credentials")
         raise
     return credentials
 
 
-def load_saved_credentials(
+async def load_saved_credentials(
     storage_access_point: Path | AsyncIOMotorCollection,
 ) -> Credentials | None:
     """
@@ -342,7 +467,7 @@ def load_saved_credentials(
         storage_access_point,
     )
     credentials_storage = create_credentials_storage(storage_access_point)
-    credentials = credentials_storage.load()
+    credentials = await credentials_storage.load()
 
     if credentials:
         logger.debug("Credentials from storage: %s loaded", credentials_storage)
@@ -362,7 +487,7 @@ async def get_new_credentials(
     auth_pipe: AuthPipe,
 ) -> Credentials | Credentials2:
     logger.debug("Credentials not found, running auth method: %s", app_type)
-    client_secret = _load_client_secret_file(client_secret_file_path)
+    client_secret = _load_client_secret_config(client_secret_file_path)
 
     credentials_storage = create_credentials_storage(Path("tmp/credentials.json"))
     match app_type:
@@ -374,12 +499,12 @@ async def get_new_credentials(
                 access_scopes,
                 auth_pipe,
             )
-    credentials_storage.save(credentials)
+    await credentials_storage.save(credentials)
     return credentials
 
 
 def _auth_as_local_app(
-    client_secret: Path,
+    client_secret: dict,
     access_scopes: AccessScopes,
 ) -> Credentials | Credentials2:
     """
@@ -388,11 +513,10 @@ def _auth_as_local_app(
     Access scopes: https://developers.google.com/identity/protocols/oauth2/scopes
     """
     logger.debug(
-        "Auth via browser with client secret file: %s, for access scopes: %s",
-        client_secret,
+        "Auth via browser for access scopes: %s",
         access_scopes,
     )
-    flow = InstalledAppFlow.from_client_secrets_file(
+    flow = InstalledAppFlow.from_client_config(
         client_secret,
         scopes=access_scopes,
     )
@@ -409,7 +533,7 @@ def _auth_as_local_app(
 
 
 async def _auth_web_with_code(
-    client_secret: Path,
+    client_secret: dict,
     access_scopes: AccessScopes,
     auth_pipe: AuthPipe,
 ) -> Credentials | Credentials2:
@@ -418,11 +542,10 @@ async def _auth_web_with_code(
     Access scopes: https://developers.google.com/identity/protocols/oauth2/scopes
     """
     logger.debug(
-        "Auth using code with client secret file: %s, for access scopes: %s",
-        client_secret,
+        "Auth using code for access scopes: %s",
         access_scopes,
     )
-    flow = Flow.from_client_secrets_file(
+    flow = Flow.from_client_config(
         client_secret,
         scopes=access_scopes,
         redirect_uri="urn:ietf:wg:oauth:2.0:oob",
@@ -460,8 +583,8 @@ def create_flow(
 
     # TODO: add client secret path to env
 
-    return Flow.from_client_secrets_file(
-        _load_client_secret_file(CLIENT_SECRET_PATH),
+    return Flow.from_client_config(
+        _load_client_secret_config(CLIENT_SECRET_PATH),
         scopes=access_scopes,
         redirect_uri=redirect_uri,
     )
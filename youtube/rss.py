@@ -1,5 +1,8 @@
+import logging
+import re
 from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Literal
 
 import isodate
@@ -8,12 +11,11 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from zoneinfo import ZoneInfo
 
 from youtube.db import (
-    load_rss_deque_from_db,
+    push_video_ids_to_rss_deque,
     read_videos_info_from_db_by_id_list,
-    save_rss_deque_to_db,
 )
 from youtube.exeptions import SettingsError
-from youtube.schemas import VideoItem
+from youtube.schemas import FeedVideoItem
 from youtube.utils.logger import conf_logger
 
 logger = conf_logger(__name__, "E")
@@ -26,7 +28,26 @@ xml_namespaces = {
 }
 
 
-def parse_video_duration(video: VideoItem) -> str:
+# Ютуб отдает длительность почти всегда в виде PT[nH][nM][nS]
+_yt_duration_pattern = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_duration(duration: str) -> str:
+    """Function parse iso 8601 duration string to human readable form.
+
+    Durations repeat between feed rebuilds, so results are cached
+    """
+    match = _yt_duration_pattern.fullmatch(duration)
+    if match is None:
+        # Редкие формы вроде "P0D" у трансляций разбираем универсальным парсером
+        parsed = isodate.parse_duration(duration)
+        return str(timedelta(seconds=parsed.total_seconds()))
+    hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def parse_video_duration(video: FeedVideoItem) -> str:
     """Function parse video duration and return it as string"""
     if video.contentDetails is None:
         msg = (
@@ -36,26 +57,26 @@ def parse_video_duration(video: VideoItem) -> str:
         )
         logger.error(msg)
         raise SettingsError(msg)
-    duration = isodate.parse_duration(video.contentDetails.duration)
-    return str(timedelta(seconds=duration.total_seconds()))
+    return _parse_iso_duration(video.contentDetails.duration)
 
 
-def convert_description_to_html(video: VideoItem) -> str:
+def convert_description_to_html(video: FeedVideoItem) -> str:
     """Function convert description to html to embed in rss item as html <p>"""
-    html_description = []
-    for line in video.snippet.description.splitlines():
-        html_description.append(f"<p>{line}</p>")
-    return "".join(html_description)
+    lines = video.snippet.description.splitlines()
+    if not lines:
+        return ""
+    # Один join на C-уровне вместо f-string на каждую строку описания
+    return "<p>" + "</p><p>".join(lines) + "</p>"
+
+
+_local_tz = ZoneInfo("Asia/Yekaterinburg")
 
 
 def local_time_filter(date: datetime, format_="<%H:%M> %d.%m.%y") -> str:
-    local_tz = ZoneInfo("Asia/Yekaterinburg")
-    local_dt = date.astimezone(tz=local_tz)
-    local_dt.replace(tzinfo=local_tz)
-    return local_dt.strftime(format_)
+    return date.astimezone(_local_tz).strftime(format_)
 
 
-def _get_player_html_iframe(video: VideoItem) -> str:
+def _get_player_html_iframe(video: FeedVideoItem) -> str:
     if video.player is None:
         msg = (
             f"Video {video.id} has no player field. "
@@ -67,32 +88,49 @@ def _get_player_html_iframe(video: VideoItem) -> str:
     return video.player.embedHtml
 
 
+# Таблица для экранирования спецсимволов xml одним проходом translate
+_xml_escape_table = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"},
+)
+_needs_xml_escape = re.compile(r'[&<>"]').search
+
+
 def strip_str_from_amp(text: str) -> str:
-    """Function to strip & (ampersands) from string.
-    Ampersand is escaped symobol in xml.
-    """
-    return text.replace("&", "&amp")
+    """Function to escape xml special symbols (&, <, >, ") in string"""
+    # Большинство строк чистые — возвращаем оригинал без аллокации
+    if _needs_xml_escape(text) is None:
+        return text
+    return text.translate(_xml_escape_table)
 
 
-def create_rss_from_template(
-    videos: Iterable[VideoItem],
-    template_path: Literal["rss20.jinja", "atom.jinja"],
-) -> bytes:
-    """Function to create rss xml from template"""
-    # TODO: create template with youtube namespaces
-    logger.debug("Creating rss xml from template")
+def _create_template_environment() -> Environment:
+    """Function build Jinja environment for rss templates"""
     env = Environment(
         loader=FileSystemLoader("youtube/templates"),
         autoescape=select_autoescape(["html", "xml"]),
+        auto_reload=False,
+        cache_size=-1,
     )
     env.globals["parse_video_duration"] = parse_video_duration
     env.globals["convert_description_to_html"] = convert_description_to_html
     env.filters["local_time_filter"] = local_time_filter
+    return env
 
-    template = env.get_template(template_path)
 
-    #TODO: вынести загрузку шаблона на самый верх в точку доступа, чтобы не читать с \
-    # диска каждый раз при создании ленты
+# Окружение и скомпилированные шаблоны собираются один раз, чтобы не ходить
+# на диск и не перекомпилировать шаблон при каждой сборке ленты
+_template_environment = _create_template_environment()
+_get_template = lru_cache(maxsize=8)(_template_environment.get_template)
+
+
+def create_rss_from_template(
+    videos: Iterable[FeedVideoItem],
+    template_path: Literal["rss20.jinja", "atom.jinja"],
+) -> bytes:
+    """Function to create rss xml from template"""
+    # TODO: create template with youtube namespaces
+    logger.debug("Creating rss xml from template")
+    template = _get_template(template_path)
 
     result = template.render(
         videos=videos,
@@ -105,12 +143,12 @@ async def form_rss_feed_from_videos_list(
     db: AsyncIOMotorDatabase, video_ids: Iterable[str],
 ) -> bytes:
     """Function create rss 2.0 feed"""
-    logger.debug("Forming rss 2.0 feed from video ids: %s", video_ids)
-    rss_deque = await load_rss_deque_from_db(db)
-    rss_deque.extend(video_ids)
-    _ = await save_rss_deque_to_db(db, rss_deque)
-
-    videos = await read_videos_info_from_db_by_id_list(db.videos, rss_deque)
+    # Материализуем заранее, чтобы лог не исчерпал генератор
+    video_ids = tuple(video_ids)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Forming rss 2.0 feed from video ids: %s", video_ids)
+    rss_ids = await push_video_ids_to_rss_deque(db, video_ids)
+    videos = await read_videos_info_from_db_by_id_list(db.videos, rss_ids)
 
     xml = create_rss_from_template(videos, "rss20.jinja")
     logger.debug("RSS feed created")
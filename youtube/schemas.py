@@ -8,9 +8,7 @@ from pydantic import (
     ConfigDict,
     HttpUrl,
     PlainSerializer,
-    field_serializer,
 )
-from pydantic_core import Url
 
 iso_datetime = Annotated[
     datetime,
@@ -20,9 +18,19 @@ iso_datetime = Annotated[
     ),
 ]
 
+# Урл валидируется как HttpUrl, но хранится обычной строкой, чтобы не гонять
+# Url.__str__ при каждой сериализации и не держать field_serializer на моделях
+http_url_str = Annotated[
+    str,
+    BeforeValidator(lambda x: str(HttpUrl(x))),  # pyright: ignore [reportAny]
+]
+
 
 class PydantModel(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+    # defer_build откладывает сборку валидаторов до первого использования:
+    # модели горячего пути все равно собираются TypeAdapter-ами в db.py,
+    # а редкие (fileDetails, processingDetails и т.п.) часто не нужны вовсе
+    model_config = ConfigDict(extra="forbid", frozen=True, defer_build=True)
 
 
 class VideoId(PydantModel):
@@ -32,15 +40,9 @@ class VideoId(PydantModel):
 
 class VideoThumbnail(PydantModel):
     height: int
-    url: HttpUrl
+    url: http_url_str
     width: int
 
-    @field_serializer("url")
-    def mongodb_url2str(self, val: str) -> str:
-        if isinstance(val, Url):  ### This magic! If isinstance(val, HttpUrl) - error
-            return str(val)
-        return val
-
 
 class SearchVideoThumbnails(PydantModel):
     default: VideoThumbnail
@@ -90,13 +92,7 @@ class SubscriptionResourseId(PydantModel):
 
 
 class SubscriptionThumbnail(PydantModel):
-    url: HttpUrl
-
-    @field_serializer("url")
-    def mongodb_url2str(self, val: str) -> str:
-        if isinstance(val, Url):  ### This magic! If isinstance(val, HttpUrl) - error
-            return str(val)
-        return val
+    url: http_url_str
 
 
 class SubscriptionThumbnails(PydantModel):
@@ -389,3 +385,30 @@ class VideosResponse(PydantModel):
     prevPageToken: str | None = None
     pageInfo: PageInfoResults
     items: list[VideoItem]
+
+
+class FeedVideoSnippet(PydantModel):
+    publishedAt: datetime
+    title: str
+    description: str
+    channelTitle: str
+
+
+class FeedVideoContentDetails(PydantModel):
+    duration: str = "PT0H0M0S"
+
+
+class FeedVideoPlayer(PydantModel):
+    embedHtml: str
+
+
+class FeedVideoItem(PydantModel):
+    """Урезанная проекция VideoItem только с полями, нужными шаблонам лент"""
+
+    id: str
+    snippet: FeedVideoSnippet
+    contentDetails: FeedVideoContentDetails | None = None
+    player: FeedVideoPlayer | None = None
+
+    def __hash__(self) -> int:
+        return hash(self.id)
@@ -1,12 +1,16 @@
+import atexit
 import logging
 import os
+import queue
 import sys
-import urllib.parse
-import urllib.request
+import threading
+import time
 from logging import Handler, Logger, LogRecord
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
 from typing import Literal, override
-from urllib.error import HTTPError, URLError
+
+import requests
 
 from config import env
 
@@ -28,6 +32,37 @@ log_level_aliases = {
     "C": logging.CRITICAL,
 }
 
+def _create_handlers() -> list[Handler]:
+    """Function create real output handlers for the queue listener"""
+    handlers = [_create_console_handler()]
+    if not DEBUG_MODE:
+        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+            handlers.append(
+                _create_telegram_handler(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID),
+            )
+        if LOG_FILE:
+            _create_log_directory(LOG_FILE)
+            handlers.append(_create_file_handler())
+    return handlers
+
+
+def _start_queue_listener() -> queue.Queue:
+    """Function start shared logging queue listener.
+
+    Handlers работают в отдельном потоке слушателя, поэтому медленная
+    отправка (телеграм, файл) не блокирует корутины, пишущие в лог
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue,
+        *_create_handlers(),
+        respect_handler_level=True,
+    )
+    listener.start()
+    _ = atexit.register(listener.stop)
+    return log_queue
+
+
 def conf_logger(
     logger_name: str,
     log_level: Literal["C", "E", "W", "I", "D", "N"] = "E",
@@ -40,51 +75,36 @@ def conf_logger(
 
     logger = logging.getLogger(logger_name)
 
-    _add_project_name_attr(PROJECT_NAME)
-
-    logger.addHandler(_create_console_handler())
+    logger.addHandler(QueueHandler(_log_queue))
     if DEBUG_MODE:
         level = log_level_aliases[log_level]
     else:
         level = logging.ERROR
 
-        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-            logger.addHandler(
-                _create_telegram_handler(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID),
-            )
-
-        if LOG_FILE:
-            _create_log_directory(LOG_FILE)
-            logger.addHandler(_create_file_handler())
-
     logger.setLevel(level)
 
     return logger
 
-def _add_project_name_attr(project_name: str) -> None:
-    """Function add project name to messages"""
+class _ProjectLogRecord(LogRecord):
+    """LogRecord with project name attribute.
 
-    old_factory = logging.getLogRecordFactory()
+    Фабрика ставится один раз при импорте: раньше каждый вызов conf_logger
+    заворачивал фабрику в новое замыкание, добавляя кадр на каждую запись
+    """
 
-    def record_factory(
+    def __init__(
+        self,
         *args,  # pyright: ignore [reportUnknownParameterType, reportMissingParameterType]  # noqa: ANN002
         **kwargs,  # pyright: ignore [reportUnknownParameterType, reportMissingParameterType]
-    ) -> LogRecord:
-
-        record = old_factory(*args, **kwargs)
-        record.project_name = project_name
-        return record
-
-    logging.setLogRecordFactory(
-        factory=record_factory,  # pyright: ignore[reportUnknownArgumentType]
-    )
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.project_name = PROJECT_NAME
 
 
 def _create_console_handler() -> Handler:
     """Function to create console handler for logging"""
     formatter = logging.Formatter(
-        fmt='[{levelname:<8}] [{name}:{funcName}:{lineno}]: "{message}"',
-        style="{",
+        fmt='[%(levelname)-8s] [%(name)s:%(funcName)s:%(lineno)d]: "%(message)s"',
     )
 
     handler = logging.StreamHandler(stream=sys.stdout)
@@ -97,46 +117,92 @@ def _create_console_handler() -> Handler:
 def _create_file_handler() -> Handler:
     """Function to create file handler for logging"""
     formatter = logging.Formatter(
-        fmt='[{levelname:<8}: {asctime}] [{name}:{funcName}:{lineno}]: "{message}"',
-        style="{",
+        fmt='[%(levelname)-8s: %(asctime)s] '
+        '[%(name)s:%(funcName)s:%(lineno)d]: "%(message)s"',
     )
 
-    handler = logging.FileHandler(filename=LOG_FILE, encoding="utf-8")
+    file_handler = logging.FileHandler(filename=LOG_FILE, encoding="utf-8")
+    file_handler.setFormatter(formatter)
+
+    # Буфер коалесцирует записи в один write, ERROR сбрасывается сразу,
+    # остаток докатывается на shutdown благодаря flushOnClose
+    handler = MemoryHandler(
+        capacity=512,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True,
+    )
     handler.setLevel(logging.INFO)
-    handler.setFormatter(formatter)
     return handler
 
 
-def _send_telegram_message(text: str) -> None:
+def _send_telegram_message(session: requests.Session, text: str) -> None:
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendmessage"
     post_data = {"chat_id": TELEGRAM_CHAT_ID, "text": text}
-    data = urllib.parse.urlencode(post_data).encode()
-    req = urllib.request.Request(url=url, data=data)  # noqa: S310
     try:
-        urllib.request.urlopen(req)  # noqa: S310
-    except HTTPError as e:
-        print(f"Telegram send message error. Server error {e.code}: {e.reason}")
-    except URLError as e:
-        print(f"Telegram send message error. Connection error {e.reason}")
+        _ = session.post(url, data=post_data, timeout=5)
+    except requests.RequestException as e:
+        # print вместо логгера, чтобы не зациклиться внутри обработчика
+        print(f"Telegram send message error: {e}")
 
 
 class TelegramBotHandler(Handler):
-    def __init__(self, token: str, chat_id: str) -> None:
+    """Handler буферизует записи и отправляет их пачкой одним сообщением.
+
+    Шторм ошибок дает один HTTP запрос вместо запроса на каждую запись,
+    что заодно уберегает от rate-limit телеграма
+    """
+
+    # Лимит телеграма на длину одного сообщения
+    _message_limit = 4096
+
+    def __init__(self, token: str, chat_id: str, flush_interval: float = 0.5) -> None:
         super().__init__()
         self.token = token
         self.chat_id = chat_id
+        self._buffer: list[str] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_interval = flush_interval
+        # Сессия держит keepalive-соединение к api.telegram.org,
+        # чтобы не делать TLS-рукопожатие на каждую отправку
+        self._session = requests.Session()
+        _ = atexit.register(self._session.close)
+        flusher = threading.Thread(
+            target=self._flush_loop,
+            name="telegram-log-flusher",
+            daemon=True,
+        )
+        flusher.start()
 
     @override
     def emit(self, record: LogRecord) -> None:
-        _send_telegram_message(text=self.format(record))
+        with self._buffer_lock:
+            self._buffer.append(self.format(record))
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self._flush_interval)
+            self.flush()
+
+    @override
+    def flush(self) -> None:
+        with self._buffer_lock:
+            messages, self._buffer = self._buffer, []
+        if not messages:
+            return
+        text = "\n".join(messages)
+        for start in range(0, len(text), self._message_limit):
+            _send_telegram_message(
+                self._session,
+                text=text[start : start + self._message_limit],
+            )
 
 
 def _create_telegram_handler(token: str, chat_id: str) -> Handler:
     """Function to create file handler for logging"""
     formatter = logging.Formatter(
-        fmt='[{levelname:<8}: {asctime}] [project: {project_name}] \
-                [{name}:{funcName}:{lineno}]: "{message}"',
-        style="{",
+        fmt='[%(levelname)-8s: %(asctime)s] [project: %(project_name)s] '
+        '[%(name)s:%(funcName)s:%(lineno)d]: "%(message)s"',
     )
 
     handler = TelegramBotHandler(token, chat_id)
@@ -149,3 +215,10 @@ def _create_log_directory(LOG_FILE: str) -> None:  # noqa: N803
     Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
 
 
+logging.setLogRecordFactory(_ProjectLogRecord)
+
+# Слушатель стартует в самом низу модуля: фабрики хендлеров, которые он
+# вызывает, к этому моменту уже определены
+_log_queue = _start_queue_listener()
+
+
@@ -1,22 +1,20 @@
 import asyncio
+import logging
 import sys
 from collections.abc import Iterable
+from itertools import chain
 from pathlib import Path
 
 import httpx
 from lxml import etree
-from motor.motor_asyncio import (
-    AsyncIOMotorClient,
-    AsyncIOMotorCollection,
-    AsyncIOMotorDatabase,
-)
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 
-from config import env
 from youtube.db import (
     read_last_video_ids_for_channel_from_db,
     save_items_to_db,
     save_subscriptions_to_db,
 )
+from youtube.db_client import get_db
 from youtube.exeptions import RequestError
 from youtube.google_api_auth import create_youtube_resource
 from youtube.rss import form_rss_feed_from_videos_list
@@ -26,33 +24,68 @@ from youtube.youtube_api import (
     VideoDuration,
     get_subscriptions_from_api,
     get_videos_info_from_api,
-    search_videos_from_api,
+    search_video_ids_from_api,
 )
 
 logger = conf_logger(__name__, "D")
 
+# Дальше ~16 одновременных запросов прироста нет, только лишние сокеты
+_rss_fetch_semaphore = asyncio.Semaphore(16)
+
+_rss_namespaces = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015",
+    "media": "http://search.yahoo.com/mrss/",
+}
+
+
+_ensure_indexes_lock = asyncio.Lock()
+_indexes_ready = False
+
+
+async def _ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Function create db indexes once per process.
+
+    create_index идемпотентен, поэтому достаточно одного прохода;
+    четыре запроса уходят параллельно вместо последовательных round-trip
+    """
+    global _indexes_ready  # noqa: PLW0603
+    if _indexes_ready:
+        return
+    async with _ensure_indexes_lock:
+        if _indexes_ready:
+            return
+        _ = await asyncio.gather(
+            db.subscriptions.create_index(
+                "snippet.resourceId.channelId",
+                unique=True,
+            ),
+            db.videos.create_index("id", unique=True),
+            db.videos.create_index(
+                [("snippet.channelId", 1), ("snippet.publishedAt", -1)],
+            ),
+            db.videos.create_index("snippet.publishedAt"),
+        )
+        _indexes_ready = True
+
 
 async def generate_rss_feed() -> bytes:
     """Function to generate RSS feed"""
     logger.debug("Generating rss feed")
 
-    client = AsyncIOMotorClient(
-        host=env.DB_HOST,
-        port=env.DB_PORT,
-        username=env.MONGO_INITDB_ROOT_USERNAME,
-        password=env.MONGO_INITDB_ROOT_PASSWORD,
-    )
-    db = client.youtube
+    db = get_db()
 
-    await db.subscriptions.create_index("snippet.resourceId.channelId", unique=True)
-    await db.videos.create_index("id", unique=True)
-    await db.videos.create_index("snippet.channelId")
-    await db.videos.create_index("snippet.publishedAt")
+    await _ensure_indexes(db)
 
     youtube = await create_youtube_resource(Path("tmp/credentials.json"))
     if youtube:
         new_video_ids = await _create_video_ids_list_for_rss_feed(db, youtube)
-        logger.debug("There is %s new videos: %s", len(new_video_ids), new_video_ids)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "There is %s new videos: %s",
+                len(new_video_ids),
+                new_video_ids,
+            )
     else:
         new_video_ids = []
 
@@ -67,53 +100,74 @@ def _check_if_all_requests_failed(results, exeptions) -> None:
         )
 
 
-async def _request_channel_rss_feed(channel_id: str) -> bytes | None:
-    """Function for request channel rss feed"""
+class _VideoIdCollector:
+    """Target-парсер lxml: собирает текст yt:videoId, не строя дерево"""
+
+    _video_id_tag = f"{{{_rss_namespaces['yt']}}}videoId"
+
+    def __init__(self) -> None:
+        self._ids: list[str] = []
+        self._in_video_id = False
+
+    def start(self, tag: str, attrib) -> None:  # noqa: ARG002
+        self._in_video_id = tag == self._video_id_tag
+
+    def end(self, tag: str) -> None:  # noqa: ARG002
+        self._in_video_id = False
+
+    def data(self, text: str) -> None:
+        if self._in_video_id:
+            self._ids.append(text)
+
+    def close(self) -> tuple[str, ...]:
+        return tuple(self._ids)
+
+
+async def _request_channel_rss_feed(
+    client: httpx.AsyncClient,
+    channel_id: str,
+) -> tuple[str, ...]:
+    """Function request channel rss feed and return its video ids.
+
+    Тело ответа скармливается потоковому парсеру по кускам, полный фид
+    и DOM-дерево в памяти не собираются
+    """
     rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
     logger.debug("Request rss feed for channel %s", channel_id)
 
-    retry_transport = httpx.AsyncHTTPTransport(retries=3)
+    parser = etree.XMLParser(target=_VideoIdCollector())
 
     try:
-        async with httpx.AsyncClient(transport=retry_transport) as client:
-            response = await client.get(rss_url)
-            response.raise_for_status()
+        async with client.stream("GET", rss_url) as response:
+            _ = response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
 
     except httpx.HTTPStatusError as e:
+        logger.exception("HTTP status error for %s %s", rss_url, e.response)
         msg = f"HTTP status error for {rss_url} {e.response}"
-        logger.exception(msg)
         raise RequestError(msg) from e
 
     except httpx.RequestError as e:
+        logger.exception(
+            "Connection error for %s. Error info: %s",
+            rss_url,
+            sys.exc_info()[1],
+        )
         msg = f"Connection error for {rss_url}. Error info: {sys.exc_info()[1]}"
-        logger.exception(msg)
         raise RequestError(msg) from e
 
-    logger.debug("Got rss feed for channel %s", channel_id)
-    return response.content
-
-
-def _get_video_ids_from_rss(rss_feed) -> tuple[str, ...]:
-    """Function parse rss feed and return video ids"""
-    logger.debug("Extracting video ids from rss feed")
-    rss = etree.fromstring(rss_feed)  # noqa: S320
-    namespaces = {
-        "atom": "http://www.w3.org/2005/Atom",
-        "yt": "http://www.youtube.com/xml/schemas/2015",
-        "media": "http://search.yahoo.com/mrss/",
-    }
-    video_ids = rss.xpath(
-        "//atom:entry/yt:videoId/text()",
-        namespaces=namespaces,
-    )
-    video_ids = tuple(
-        str(i) for i in video_ids  # pyright: ignore [reportGeneralTypeIssues]
+    video_ids: tuple[str, ...] = parser.close()
+    logger.debug(
+        "Got %s video ids from rss feed for channel %s",
+        len(video_ids),
+        channel_id,
     )
-    logger.debug("Extracted %s video ids from rss feed: %s", len(video_ids), video_ids)
     return video_ids
 
 
 async def _get_channel_new_video_ids(
+    client: httpx.AsyncClient,
     channel_id: str,
     vid_collection,
 ) -> tuple[str, ...]:
@@ -123,19 +177,21 @@ async def _get_channel_new_video_ids(
         "Getting only new video ids(rss exclude db) for channel %s",
         channel_id,
     )
-    rss_feed = await _request_channel_rss_feed(channel_id)
-    rss_video_ids: tuple[str, ...] = _get_video_ids_from_rss(rss_feed)
-    ids_in_db: tuple[str, ...] = await read_last_video_ids_for_channel_from_db(
+    async with _rss_fetch_semaphore:
+        rss_video_ids = await _request_channel_rss_feed(client, channel_id)
+    ids_in_db = await read_last_video_ids_for_channel_from_db(
         vid_collection,
         channel_id,
     )
-    new_video_ids = tuple(set(rss_video_ids) - set(ids_in_db))
-    logger.debug(
-        "For channel %s found %s new video ids: %s",
-        channel_id,
-        len(new_video_ids),
-        new_video_ids,
-    )
+    # Фильтрация сохраняет порядок видео из rss, в отличие от разности множеств
+    new_video_ids = tuple(vid for vid in rss_video_ids if vid not in ids_in_db)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "For channel %s found %s new video ids: %s",
+            channel_id,
+            len(new_video_ids),
+            new_video_ids,
+        )
     return new_video_ids
 
 
@@ -146,23 +202,26 @@ async def _get_new_video_ids_for_all_channels(
     """Function for getting new video ids for all channels"""
     logger.debug("Getting new video ids for all channels")
 
-    tasks = [
-        asyncio.create_task(_get_channel_new_video_ids(channel_id, vid_collection))
-        for channel_id in channel_ids
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    video_ids = []
-    exeptions = []
-    for res in results:
-        if isinstance(res, RequestError):
-            exeptions.append(res)
-        elif isinstance(res, tuple):
-            video_ids.extend(res)
+    # Один клиент с keepalive-пулом на все каналы вместо отдельного
+    # соединения (DNS + TCP + TLS) на каждый запрос
+    async with httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(retries=3),
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+    ) as client:
+        tasks = [
+            asyncio.create_task(
+                _get_channel_new_video_ids(client, channel_id, vid_collection),
+            )
+            for channel_id in channel_ids
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    successes = [res for res in results if not isinstance(res, BaseException)]
+    exeptions = [res for res in results if isinstance(res, RequestError)]
 
     _check_if_all_requests_failed(results, exeptions)
 
-    return video_ids
+    return list(chain.from_iterable(successes))
 
 
 async def get_channel_all_video_ids_from_api(
@@ -171,12 +230,12 @@ async def get_channel_all_video_ids_from_api(
     duration: VideoDuration = "any",
 ) -> tuple[str, ...]:
     """Function for getting all video ids from channel"""
-    videos = await search_videos_from_api(
+    video_ids = await search_video_ids_from_api(
         youtube,
         channel_id=channel_id,
         duration=duration,
     )
-    return tuple(i.id.videoId for i in videos)
+    return tuple(video_ids)
 
 
 def extract_channel_ids_from_subscriptions(
@@ -1,23 +1,65 @@
 import asyncio
-from collections.abc import Iterable
+import atexit
+import os
+import threading
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from itertools import batched
+from itertools import batched, chain
 from typing import Literal, Sequence
 
-from pydantic import ValidationError
+import google_auth_httplib2
+import httplib2
+from pydantic import TypeAdapter, ValidationError
 
 from youtube.schemas import (
-    SearchResult,
     SearchResultVideo,
     Subscription,
-    SubscriptionResponse,
     VideoItem,
-    VideosResponse,
 )
 from youtube.utils.logger import conf_logger
 
 logger = conf_logger(__name__, "E")
 
+# Валидируются только элементы страницы: обертку ответа (pageInfo, etag и
+# токены страниц) pydantic прогонять незачем, пагинацией занимается list_next
+_subscription_items_adapter = TypeAdapter(list[Subscription])
+_search_items_adapter = TypeAdapter(list[SearchResultVideo])
+_video_items_adapter = TypeAdapter(list[VideoItem])
+
+# Свой пул для блокирующих request.execute: размер настраивается через
+# YT_POOL и не зависит от общего executor-а событийного цикла
+_api_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("YT_POOL", "16")),
+    thread_name_prefix="yt-api",
+)
+_ = atexit.register(_api_executor.shutdown)
+
+# httplib2.Http не потокобезопасен, а Resource (и его AuthorizedHttp)
+# один на процесс, поэтому у каждого потока пула свое http-соединение
+_thread_http = threading.local()
+
+
+def _execute(request):  # noqa: ANN001, ANN202
+    credentials = request.http.credentials
+    http = getattr(_thread_http, "http", None)
+    if http is None or http.credentials is not credentials:
+        http = google_auth_httplib2.AuthorizedHttp(
+            credentials,
+            http=httplib2.Http(),
+        )
+        _thread_http.http = http
+    return request.execute(http=http)
+
+
+async def _execute_request(request):  # noqa: ANN001, ANN202
+    return await asyncio.get_running_loop().run_in_executor(
+        _api_executor,
+        _execute,
+        request,
+    )
+
+
 video_part = Literal[
     "contentDetails",
     "fileDetails",
@@ -36,6 +78,13 @@ video_part = Literal[
 
 VideoDuration = Literal["any", "long", "medium", "short"]
 
+# Дефолтный набор part уже склеен, чтобы не джойнить его на каждый вызов
+_default_parts_str = "contentDetails,snippet,player"
+
+# Маска частичного ответа: из обертки страницы нужны только элементы
+# и токен следующей страницы для list_next
+_page_fields = "nextPageToken,items"
+
 
 async def get_subscriptions_from_api(
     youtube,
@@ -61,29 +110,34 @@ async def get_subscriptions_from_api(
         results_per_page,
         order,
     )
-    subscriptions: set[Subscription] = set()
+    all_items: list[Subscription] = []
     resource = youtube.subscriptions
     request = resource().list(
         part=part,
         mine=True,  # авторизация по моему аккаунту
         maxResults=results_per_page,
         order=order,
+        fields=_page_fields,
     )
     while request is not None:
-        response = await asyncio.to_thread(request.execute)
+        response = await _execute_request(request)
         try:
-            subscriptions_result = SubscriptionResponse.model_validate(response)
+            items = _subscription_items_adapter.validate_python(
+                response.get("items", []),
+            )
         except ValidationError:
             logger.exception("Failed to validate user subscriptions loaded from api")
             raise
-        subscriptions.update(subscriptions_result.items)
+        all_items.extend(items)
         request = resource().list_next(request, response)
 
+    # Множество собирается один раз в конце, без перехеширования на страницу
+    subscriptions = set(all_items)
     logger.debug("Recieved %s subscriptions from api", len(subscriptions))
     return subscriptions
 
 
-async def search_videos_from_api(  # noqa: PLR0913
+async def iter_search_videos_from_api(  # noqa: PLR0913
     youtube,
     channel_id: str,
     results_per_page: int = 50,
@@ -98,28 +152,31 @@ async def search_videos_from_api(  # noqa: PLR0913
     published_after: datetime | None = None,
     published_before: datetime | None = None,
     duration: VideoDuration = "any",
-) -> set[SearchResultVideo]:
+) -> AsyncIterator[list[SearchResultVideo]]:
     """
-    Fucntion returns all videos from channel by channel id
+    Function yields validated search result pages for channel one by one.
     https://developers.google.com/youtube/v3/docs/search/list
     A call to this method has a quota cost of 100 units.
     param: published_before
     The value is an RFC 3339 formatted date-time value (1970-01-01T00:00:00Z).
     param: published_after
     The value is an RFC 3339 formatted date-time value (1970-01-01T00:00:00Z).
+
+    Потребитель может обрабатывать страницу, пока грузится следующая
     """
     logger.debug(
         "Getting all videos from channel %s, results per page: %s",
         channel_id,
         results_per_page,
     )
-    videos: set[SearchResultVideo] = set()
-    additional_params = {}
-
-    if published_after:
-        additional_params["publishedAfter"] = published_after.isoformat()
-    if published_before:
-        additional_params["publishedAfter"] = published_before.isoformat()
+    additional_params = {
+        key: value.isoformat()
+        for key, value in (
+            ("publishedAfter", published_after),
+            ("publishedBefore", published_before),
+        )
+        if value is not None
+    }
 
     resource = youtube.search
     request = resource().list(
@@ -129,64 +186,172 @@ async def search_videos_from_api(  # noqa: PLR0913
         type="video",
         maxResults=results_per_page,
         videoDuration=duration,
-        # **additional_params,
+        fields=_page_fields,
+        **additional_params,
     )
-    while request is not None:
-        response = await asyncio.to_thread(request.execute)
+    response = await _execute_request(request)
+    while True:
+        next_request = resource().list_next(request, response)
+        # Следующая страница уходит в пул до yield и грузится, пока
+        # потребитель занят текущей
+        next_page = (
+            asyncio.create_task(_execute_request(next_request))
+            if next_request is not None
+            else None
+        )
         try:
-            videos_result = SearchResult.model_validate(response)
+            items = _search_items_adapter.validate_python(response.get("items", []))
         except ValidationError:
+            if next_page is not None:
+                _ = next_page.cancel()
             logger.exception(
                 "Failed to validate all videos for channel(%s) loaded from api",
                 channel_id,
             )
             raise
-        videos.update(videos_result.items)
+        try:
+            yield items
+        except GeneratorExit:
+            # Потребитель бросил генератор — префетч ему уже не нужен
+            if next_page is not None:
+                _ = next_page.cancel()
+            raise
+        if next_page is None:
+            return
+        request = next_request
+        response = await next_page
+
+
+async def search_videos_from_api(  # noqa: PLR0913
+    youtube,
+    channel_id: str,
+    results_per_page: int = 50,
+    order: Literal[
+        "date",
+        "rating",
+        "relevance",
+        "title",
+        "videoCount",
+        "viewCount",
+    ] = "date",
+    published_after: datetime | None = None,
+    published_before: datetime | None = None,
+    duration: VideoDuration = "any",
+) -> set[SearchResultVideo]:
+    """
+    Fucntion returns all videos from channel by channel id.
+    Thin wrapper collecting iter_search_videos_from_api pages into a set
+    """
+    all_videos: list[SearchResultVideo] = []
+    async for page_items in iter_search_videos_from_api(
+        youtube,
+        channel_id,
+        results_per_page=results_per_page,
+        order=order,
+        published_after=published_after,
+        published_before=published_before,
+        duration=duration,
+    ):
+        all_videos.extend(page_items)
+    return set(all_videos)
+
+
+async def search_video_ids_from_api(
+    youtube,
+    channel_id: str,
+    results_per_page: int = 50,
+    order: Literal[
+        "date",
+        "rating",
+        "relevance",
+        "title",
+        "videoCount",
+        "viewCount",
+    ] = "date",
+    duration: VideoDuration = "any",
+) -> set[str]:
+    """
+    Function returns all video ids from channel by channel id.
+    A call to this method has a quota cost of 100 units.
+
+    Ids берутся прямо из ответа без сборки SearchResultVideo: когда дальше
+    все равно запрашивается полная информация по id, промежуточные модели
+    не нужны
+    """
+    logger.debug(
+        "Getting all video ids from channel %s, results per page: %s",
+        channel_id,
+        results_per_page,
+    )
+    video_ids: list[str] = []
+
+    resource = youtube.search
+    request = resource().list(
+        part="snippet",
+        channelId=channel_id,
+        order=order,
+        type="video",
+        maxResults=results_per_page,
+        videoDuration=duration,
+        # Нужны только id — маска срезает все сниппеты еще на сервере
+        fields="nextPageToken,items(id/videoId)",
+    )
+    while request is not None:
+        response = await _execute_request(request)
+        video_ids.extend(item["id"]["videoId"] for item in response.get("items", []))
         request = resource().list_next(request, response)
-    return set(videos)
+    return set(video_ids)
 
 
 async def get_videos_info_from_api(
     youtube,
     video_ids: Sequence[str],
-    part: Iterable[video_part] = ("contentDetails", "snippet", "player"),
+    part: Iterable[video_part] | None = None,
 ) -> set[VideoItem]:
     """
     Function return video info for given video ids.
     https://developers.google.com/youtube/v3/docs/search/list
     A call to this method has a quota cost of 1 unit.
-    param: part - returned video info parts
+    param: part - returned video info parts, defaults to
+    contentDetails, snippet and player
     "fileDetails", "processingDetail"s and "suggestions" are only available to that
     video's owner
+    Duplicate ids are requested only once
     """
-    logger.debug("Getting all info for videos: %s. Info parts: %s", video_ids, part)
-    videos: set[VideoItem] = set()
-
     resource = youtube.videos
-    parts = ",".join(part)
-
-    for batch_ids in batched(video_ids, 50):
+    parts = _default_parts_str if part is None else ",".join(part)
+    # Дубли выкидываются до батчей, чтобы не тратить на них квоту
+    unique_ids = tuple(dict.fromkeys(video_ids))
+    logger.debug("Getting all info for videos: %s. Info parts: %s", unique_ids, parts)
+    # Батчи независимы, поэтому уходят в api параллельно; семафор держит
+    # число одновременных запросов в рамках приличия
+    semaphore = asyncio.Semaphore(8)
 
+    async def fetch_batch(batch_ids: tuple[str, ...]) -> list[VideoItem]:
+        # videos.list с <=50 id отдает все одним ответом, пагинации здесь нет
         request = resource().list(
             part=parts,
             id=",".join(batch_ids),
+            fields=_page_fields,
         )
-        while request is not None:
-            response = await asyncio.to_thread(request.execute)
-            try:
-                videos_result = VideosResponse.model_validate(response)
-            except ValidationError:
-                logger.exception(
-                    "Failed to validate info for videos(%s) loaded from api",
-                    video_ids,
-                )
-                raise
-            videos.update(videos_result.items)
-            request = resource().list_next(request, response)
-
-    if len(videos) != len(video_ids):
-        # Заметил, что иногда не совпадает, на всякий случай проверка
-        msg = f"Len output result: {len(videos)}, len input vid ids: {len(video_ids)}"
-        logger.error(msg)
-        raise ResourceWarning(msg)
-    return set(videos)
+        async with semaphore:
+            response = await _execute_request(request)
+        try:
+            return _video_items_adapter.validate_python(response.get("items", []))
+        except ValidationError:
+            logger.exception(
+                "Failed to validate info for videos(%s) loaded from api",
+                batch_ids,
+            )
+            raise
+
+    batch_results = await asyncio.gather(
+        *(fetch_batch(batch_ids) for batch_ids in batched(unique_ids, 50)),
+    )
+    videos = set(chain.from_iterable(batch_results))
+
+    if len(videos) != len(unique_ids):
+        # Обычно это удаленные или приватные видео, ронять запрос не за что
+        missing = set(unique_ids) - {video.id for video in videos}
+        logger.info("No info from api for video ids: %s", missing)
+    return videos